@@ -8,20 +8,23 @@ Fitur:
 - Animasi gulungan
 - Mode Auto-Spin
 - Tampilan lucu/cerah dengan emoji
-Requirements: streamlit, pillow, pandas
+Requirements: streamlit, pillow, pandas, numpy, numba
 """
 
 import streamlit as st
 import random
+import collections
 import time
 import io
-import math
-import wave
+import csv
 import struct
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import pandas as pd
 from datetime import datetime
 
+from slot_batch import simulate_batch
+
 st.set_page_config(page_title="Slot — Lucu & Cerah", page_icon="🍒", layout="centered")
 
 # -------------------------
@@ -37,26 +40,39 @@ PAYOUT_TABLE = {
     "🍀": 10,
     "🍉": 6,
 }
+# Secara internal gulungan disimpan sebagai ID (indeks di SYMBOLS);
+# emoji hanya dipakai saat ditampilkan.
+SYMBOL_IDS = range(len(SYMBOLS))
+BLANK = len(SYMBOLS)  # ID gulungan kosong ("-") sebelum putaran pertama
+DISPLAY_SYMBOLS = SYMBOLS + ["-"]
+PAYOUTS = tuple(PAYOUT_TABLE[s] for s in SYMBOLS)
+PAYOUTS_ARRAY = np.array(PAYOUTS, dtype=np.int64)  # untuk simulasi batch
 START_BALANCE = 1000
+HISTORY_MAX = 10000
+HISTORY_FIELDS = ["timestamp", "reels", "bet", "win", "balance_after", "message"]
 
 # -------------------------
 # Sound helpers (generate WAV bytes)
 # -------------------------
+@st.cache_data
 def generate_sine_wav(freq=440.0, duration=0.2, volume=0.5, framerate=22050):
     n_samples = int(framerate * duration)
-    buf = io.BytesIO()
-    with wave.open(buf, 'wb') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(framerate)
-        for i in range(n_samples):
-            t = float(i) / framerate
-            val = volume * math.sin(2.0 * math.pi * freq * t)
-            data = struct.pack('<h', int(val * 32767.0))
-            wf.writeframesraw(data)
-    buf.seek(0)
-    return buf.read()
-
+    # hitung semua sampel sekaligus dengan numpy (tanpa loop per sampel)
+    samples = np.arange(n_samples, dtype=np.float64)
+    samples *= 2.0 * np.pi * freq / framerate
+    np.sin(samples, out=samples)
+    np.multiply(samples, volume * 32767.0, out=samples)
+    data = samples.astype("<i2", copy=False).tobytes()
+    # header RIFF/WAVE 44 byte untuk PCM 16-bit mono, ditulis langsung tanpa modul wave
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(data), b"WAVE",
+        b"fmt ", 16, 1, 1, framerate, framerate * 2, 2, 16,
+        b"data", len(data),
+    )
+    return header + data
+
+@st.cache_data
 def generate_spin_sound():
     chunks = []
     freqs = [800, 700, 600, 500, 400]
@@ -64,6 +80,7 @@ def generate_spin_sound():
         chunks.append(generate_sine_wav(freq=f, duration=0.03, volume=0.15))
     return b"".join(chunks)
 
+@st.cache_data
 def generate_win_sound():
     chunks = []
     freqs = [520, 640, 780]
@@ -71,60 +88,106 @@ def generate_win_sound():
         chunks.append(generate_sine_wav(freq=f, duration=0.12, volume=0.22))
     return b"".join(chunks)
 
+# di-cache oleh st.cache_data, jadi tidak dibuat ulang tiap rerun
 SPIN_SOUND = generate_spin_sound()
 WIN_SOUND = generate_win_sound()
 
+def play_sound(sound):
+    # st.audio lewat media file manager: bytes yang sama -> URL /media/... yang sama,
+    # jadi browser memakai cache dan payload tidak dikirim ulang tiap putaran
+    st.audio(sound, format="audio/wav", autoplay=True)
+
 # -------------------------
 # Image helpers (render reels safely)
 # -------------------------
-def render_reels_as_image(reels, width=540, height=160, bg=(255, 255, 245)):
-    im = Image.new("RGB", (width, height), color=bg)
-    draw = ImageDraw.Draw(im)
+@st.cache_resource
+def load_default_font():
+    return ImageFont.load_default()  # font default supaya aman di Linux/Cloud
+
+DEFAULT_FONT = load_default_font()
+
+@st.cache_resource
+def get_reel_tiles(box_w, height, bg):
+    """Satu tile per simbol (indeks = ID simbol), dibuat sekali lalu dipakai ulang."""
+    tile_h = height - 24
+    tiles = []
+    for symbol in DISPLAY_SYMBOLS:
+        tile = Image.new("RGB", (box_w + 1, tile_h + 1), color=bg)
+        draw = ImageDraw.Draw(tile)
+        draw.rounded_rectangle((0, 0, box_w, tile_h), radius=12, fill=(255, 255, 255))
+        # posisi simbol perkiraan, tidak pakai textsize()
+        draw.text((box_w // 4, height // 4 - 12), symbol, font=DEFAULT_FONT, fill=(20, 20, 20))
+        tiles.append(tile)
+    return tiles
 
-    font = ImageFont.load_default()  # font default supaya aman di Linux/Cloud
+@st.cache_resource
+def get_reel_background(width, height, bg):
+    im = Image.new("RGB", (width, height), color=bg)
+    ImageDraw.Draw(im).rectangle((0, 0, width - 1, height - 1), outline=(230, 180, 255))
+    return im
 
+def render_reels_as_image(reels, width=540, height=160, bg=(255, 255, 245)):
     box_w = (width - 40) // 3
     gap = 10
+    tiles = get_reel_tiles(box_w, height, bg)
+    im = get_reel_background(width, height, bg).copy()
     x = 20
-    for symbol in reels:
-        rect = (x, 12, x + box_w, height - 12)
-        draw.rounded_rectangle(rect, radius=12, fill=(255, 255, 255))
-        # posisi simbol perkiraan, tidak pakai textsize()
-        tx = x + box_w // 4
-        ty = height // 4
-        draw.text((tx, ty), symbol, font=font, fill=(20, 20, 20))
+    for symbol_id in reels:
+        im.paste(tiles[symbol_id], (x, 12))
         x += box_w + gap
-
-    draw.rectangle((0, 0, width - 1, height - 1), outline=(230, 180, 255))
     return im
 
+def image_to_png_bytes(im):
+    # kompresi zlib ringan: encode cepat, gambar warna datar tetap kecil.
+    # Tampilkan dengan output_format="PNG" supaya st.image tidak re-encode ke JPEG.
+    buf = io.BytesIO()
+    im.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
+
+def last_reels_png():
+    # PNG gulungan terakhir disimpan di session_state, jadi rerun biasa tidak render ulang
+    key = tuple(st.session_state.last_reels)
+    if st.session_state.get("_img_key") != key:
+        st.session_state._img_png = image_to_png_bytes(render_reels_as_image(st.session_state.last_reels))
+        st.session_state._img_key = key
+    return st.session_state._img_png
+
 # -------------------------
 # Game logic
 # -------------------------
-def spin_once():
-    return [random.choice(SYMBOLS) for _ in range(3)]
+def spin_once(rng):
+    return rng.choices(SYMBOL_IDS, k=3)
 
 def evaluate_spin(reels, bet):
     if reels[0] == reels[1] == reels[2]:
-        sym = reels[0]
-        multiplier = PAYOUT_TABLE.get(sym, 0)
-        win = bet * multiplier
-        return int(win), f"🎉 Three {sym}! You win {win} coins."
-    if reels[0] == reels[1] or reels[0] == reels[2] or reels[1] == reels[2]:
+        win = int(bet * PAYOUTS[reels[0]])
+    elif reels[0] == reels[1] or reels[0] == reels[2] or reels[1] == reels[2]:
         win = int(bet * 1.5)
-        return int(win), f"🙂 Two of a kind — you win {win} coins."
-    return 0, "😞 No match — try again."
+    else:
+        win = 0
+    return win, spin_message(reels, win)
+
+def spin_message(reels, win):
+    if win == 0:
+        return "😞 No match — try again."
+    if reels[0] == reels[1] == reels[2]:
+        return f"🎉 Three {SYMBOLS[reels[0]]}! You win {win} coins."
+    return f"🙂 Two of a kind — you win {win} coins."
 
 # -------------------------
 # Init session state
 # -------------------------
 def init_state():
     st.session_state.setdefault("balance", START_BALANCE)
-    st.session_state.setdefault("last_reels", ["-", "-", "-"])
+    st.session_state.setdefault("last_reels", [BLANK, BLANK, BLANK])
     st.session_state.setdefault("last_bet", 0)
     st.session_state.setdefault("message", "Selamat datang! Gunakan koin mainan untuk bermain.")
-    st.session_state.setdefault("history", [])
+    st.session_state.setdefault("history", collections.deque(maxlen=HISTORY_MAX))
     st.session_state.setdefault("auto_running", False)
+    st.session_state.setdefault("auto_remaining", 0)
+    st.session_state.setdefault("auto_done", 0)
+    # satu RNG per sesi; bisa di-seed untuk hasil yang bisa diulang
+    st.session_state.setdefault("rng", random.Random())
 
 init_state()
 
@@ -149,8 +212,7 @@ col_left, col_right = st.columns([2, 1])
 with col_left:
     st.subheader("Reels")
     img_placeholder = st.empty()
-    img = render_reels_as_image(st.session_state.last_reels)
-    img_placeholder.image(img, use_column_width=True)
+    img_placeholder.image(last_reels_png(), use_column_width=True, output_format="PNG")
 
     st.markdown("**Hasil**")
     st.info(st.session_state.message)
@@ -167,6 +229,7 @@ with col_right:
     auto_spin = st.checkbox("Aktifkan Auto-Spin")
     auto_count = st.number_input("Jumlah putaran (Auto)", min_value=1, max_value=1000, value=10, step=1)
     auto_delay = st.slider("Delay antar putaran (s)", 0.1, 2.0, 0.5, step=0.1)
+    auto_animate = st.checkbox("Tampilkan animasi saat Auto-Spin (lebih lambat)")
 
     st.markdown("---")
     col_a, col_b = st.columns(2)
@@ -178,15 +241,18 @@ with col_right:
     st.markdown("---")
     if st.button("Reset Saldo (kembali ke 1000)"):
         st.session_state.balance = START_BALANCE
-        st.session_state.history = []
+        st.session_state.history = collections.deque(maxlen=HISTORY_MAX)
         st.session_state.message = "Saldo direset ke 1000 coins."
-        st.session_state.last_reels = ["-", "-", "-"]
-        img_placeholder.image(render_reels_as_image(st.session_state.last_reels), use_column_width=True)
+        st.session_state.last_reels = [BLANK, BLANK, BLANK]
+        img_placeholder.image(last_reels_png(), use_column_width=True, output_format="PNG")
 
     if st.button("Unduh Riwayat (CSV)"):
-        df = pd.DataFrame(st.session_state.history)
-        csv = df.to_csv(index=False).encode("utf-8")
-        st.download_button("Download CSV", data=csv, file_name="slot_history.csv", mime="text/csv")
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=HISTORY_FIELDS)
+        writer.writeheader()
+        writer.writerows(st.session_state.history)
+        csv_bytes = buf.getvalue().encode("utf-8")
+        st.download_button("Download CSV", data=csv_bytes, file_name="slot_history.csv", mime="text/csv")
 
 # -------------------------
 # Spin functions
@@ -197,33 +263,48 @@ def do_spin(bet_amount, frames=9, speed=0.08, play_sounds=True):
         return
     st.session_state.last_bet = bet_amount
     st.session_state.balance -= bet_amount
-    for i in range(frames):
-        tmp = [random.choice(SYMBOLS) for _ in range(3)]
-        img = render_reels_as_image(tmp)
-        img_placeholder.image(img, use_column_width=True)
-        if play_sounds:
-            st.audio(SPIN_SOUND, format="audio/wav")
+    rng = st.session_state.rng
+    choices = rng.choices
+    # semua frame dirender & di-encode dulu, loop animasi cukup tampil + sleep
+    png_frames = [
+        image_to_png_bytes(render_reels_as_image(choices(SYMBOL_IDS, k=3)))
+        for _ in range(frames)
+    ]
+    # suara spin cukup dikirim sekali, bukan tiap frame
+    if play_sounds:
+        play_sound(SPIN_SOUND)
+    for png in png_frames:
+        img_placeholder.image(png, use_column_width=True, output_format="PNG")
         time.sleep(speed)
-    final = spin_once()
+    final = spin_once(rng)
     st.session_state.last_reels = final
-    img_placeholder.image(render_reels_as_image(final), use_column_width=True)
+    img_placeholder.image(last_reels_png(), use_column_width=True, output_format="PNG")
     win, msg = evaluate_spin(final, bet_amount)
-    if win > 0:
-        st.session_state.balance += win
-        if play_sounds:
-            st.audio(WIN_SOUND, format="audio/wav")
+    if win > 0 and play_sounds:
+        play_sound(WIN_SOUND)
+    record_spin(final, bet_amount, win, msg)
+
+def record_spin(final, bet_amount, win, msg):
+    # taruhan sudah dipotong dari saldo sebelum fungsi ini dipanggil
+    st.session_state.balance += win
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     msg_full = f"{msg} (Taruhan: {bet_amount}) · Saldo sekarang: {st.session_state.balance}"
     st.session_state.message = msg_full
-    st.session_state.history.insert(0, {
+    st.session_state.history.appendleft({
         "timestamp": now,
-        "reels": " ".join(final),
+        "reels": " ".join(SYMBOLS[i] for i in final),
         "bet": bet_amount,
         "win": win,
         "balance_after": st.session_state.balance,
         "message": msg
     })
 
+def finish_auto():
+    st.session_state.auto_running = False
+    st.session_state.auto_remaining = 0
+    st.session_state.action_in_progress = False
+    st.success(f"Auto-Spin selesai ({st.session_state.auto_done} putaran).")
+
 # -------------------------
 # Handle interactions
 # -------------------------
@@ -242,22 +323,48 @@ if spin_btn and not st.session_state.action_in_progress:
 
 if auto_btn:
     st.session_state.auto_running = not st.session_state.auto_running
+    if st.session_state.auto_running:
+        st.session_state.auto_remaining = int(auto_count)
+        st.session_state.auto_done = 0
+    else:
+        finish_auto()
 
 if st.session_state.auto_running:
     st.session_state.action_in_progress = True
-    spins_done = 0
-    for i in range(int(auto_count)):
-        if st.session_state.balance <= 0:
+    if auto_animate:
+        # satu putaran per run lalu st.rerun(), jadi tombol Stop tetap bisa diproses
+        if bet > st.session_state.balance:
             st.warning("Saldo habis. Auto-Spin berhenti.")
-            break
-        do_spin(bet, frames=animation_frames, speed=spin_speed, play_sounds=True)
-        spins_done += 1
-        if not st.session_state.auto_running:
-            break
-        time.sleep(auto_delay)
-    st.session_state.auto_running = False
-    st.session_state.action_in_progress = False
-    st.success(f"Auto-Spin selesai ({spins_done} putaran).")
+            finish_auto()
+        else:
+            do_spin(bet, frames=animation_frames, speed=spin_speed, play_sounds=True)
+            st.session_state.auto_done += 1
+            st.session_state.auto_remaining -= 1
+            if st.session_state.auto_remaining > 0:
+                time.sleep(auto_delay)
+                st.rerun()
+            finish_auto()
+    else:
+        # mode cepat: semua putaran dihitung sekaligus tanpa render frame,
+        # UI hanya menampilkan gulungan terakhir
+        reels_batch, wins_batch = simulate_batch(
+            st.session_state.auto_remaining, int(bet), PAYOUTS_ARRAY, st.session_state.rng.randrange(2**31)
+        )
+        final = None
+        for ids, win in zip(reels_batch, wins_batch):
+            if bet > st.session_state.balance:
+                st.warning("Saldo habis. Auto-Spin berhenti.")
+                break
+            final = ids.tolist()
+            win = int(win)
+            st.session_state.last_bet = bet
+            st.session_state.balance -= bet
+            record_spin(final, bet, win, spin_message(final, win))
+            st.session_state.auto_done += 1
+        if final is not None:
+            st.session_state.last_reels = final
+            img_placeholder.image(last_reels_png(), use_column_width=True, output_format="PNG")
+        finish_auto()
 
 # -------------------------
 # Show history
@@ -267,7 +374,7 @@ st.subheader("📜 Riwayat Spin")
 if len(st.session_state.history) == 0:
     st.info("Belum ada riwayat — mainkan dulu beberapa putaran!")
 else:
-    df_hist = pd.DataFrame(st.session_state.history)
+    df_hist = pd.DataFrame(list(st.session_state.history))
     with st.expander("Tampilkan riwayat (klik untuk buka)"):
         st.dataframe(df_hist, use_container_width=True)
 
@@ -0,0 +1,38 @@
+# slot_batch.py
+"""
+Simulasi Auto-Spin batch (dikompilasi numba).
+Sengaja dipisah dari app.py: Streamlit menjalankan ulang app.py tiap rerun,
+sedangkan modul yang di-import tetap tersimpan di sys.modules, jadi fungsi
+yang sudah dikompilasi tidak perlu dimuat ulang.
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def evaluate_batch(reels_int, bet, payouts):
+    """Versi vektor dari evaluate_spin untuk array ID simbol shape (n, 3)."""
+    r0 = reels_int[:, 0]
+    r1 = reels_int[:, 1]
+    r2 = reels_int[:, 2]
+    all_equal = (r0 == r1) & (r1 == r2)
+    any_pair = (r0 == r1) | (r0 == r2) | (r1 == r2)
+    pair_wins = np.where(any_pair, (bet * 3) // 2, 0)
+    return np.where(all_equal, bet * payouts[r0], pair_wins)
+
+@njit(cache=True)
+def simulate_batch(n, bet, payouts, seed):
+    """Putar n kali sekaligus (untuk Auto-Spin).
+
+    Mengembalikan (reels, wins): reels berisi ID simbol dengan shape (n, 3),
+    wins berisi kemenangan tiap putaran.
+    """
+    # di dalam njit, np.random memakai state RNG milik numba (bukan global NumPy)
+    np.random.seed(seed)
+    n_symbols = payouts.shape[0]
+    reels = np.empty((n, 3), dtype=np.int64)
+    for i in range(n):
+        for j in range(3):
+            reels[i, j] = np.random.randint(0, n_symbols)
+    return reels, evaluate_batch(reels, bet, payouts)